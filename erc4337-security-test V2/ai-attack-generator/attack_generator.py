@@ -21,10 +21,12 @@ Environment:
 
 import argparse
 import asyncio
+import hashlib
 import json
 import os
 import random
 import re
+import tempfile
 from dataclasses import dataclass
 from datetime import datetime
 from enum import Enum
@@ -32,7 +34,9 @@ from pathlib import Path
 from typing import Dict, List, Optional, Tuple
 
 import aiohttp
+import orjson
 import requests
+from requests.adapters import HTTPAdapter
 
 
 # ---------------------------------------------------------------------------
@@ -858,6 +862,10 @@ M4_STATIC_ATTACKS = [
 # ---------------------------------------------------------------------------
 
 
+# A markdown fence line (```json, ```, ...); text between fence lines is code
+_FENCE_RE = re.compile(r"^[ \t]*```.*$", re.MULTILINE)
+
+
 def _parse_userop_json(response_text: str) -> Optional[Dict]:
     """Extract a UserOperation dict from raw AI response text.
 
@@ -866,16 +874,8 @@ def _parse_userop_json(response_text: str) -> Optional[Dict]:
     """
     text = response_text.strip()
     if text.startswith("```"):
-        lines = text.split("\n")
-        json_lines: List[str] = []
-        inside = False
-        for line in lines:
-            if line.strip().startswith("```"):
-                inside = not inside
-                continue
-            if inside:
-                json_lines.append(line)
-        text = "\n".join(json_lines).strip()
+        # Odd-indexed parts lie inside a fence pair (or after an unclosed one)
+        text = "\n".join(_FENCE_RE.split(text)[1::2]).strip()
     try:
         return json.loads(text)
     except json.JSONDecodeError:
@@ -975,6 +975,8 @@ class AttackGenerator:
         api_key: Optional[str] = None,
         base_url: str = "https://api.deepseek.com",
         temperature: float = 0.7,
+        use_cache: bool = True,
+        cache_dir: str = ".ai_cache",
     ):
         self.api_key = api_key or os.getenv("DEEPSEEK_API_KEY")
         if not self.api_key:
@@ -985,6 +987,68 @@ class AttackGenerator:
         self.model = "deepseek-chat"
         self.temperature = temperature
 
+        # Raw responses keyed by prompt hash; identical prompts skip the API call
+        self.use_cache = use_cache
+        self.cache_dir = Path(cache_dir)
+        if self.use_cache:
+            self.cache_dir.mkdir(exist_ok=True)
+
+        # One keep-alive session for all calls, so repeated generate() calls
+        # reuse the TCP/TLS connection instead of handshaking every time
+        self.session = requests.Session()
+        self.session.headers.update(
+            {
+                "Content-Type": "application/json",
+                "Authorization": f"Bearer {self.api_key}",
+            }
+        )
+        adapter = HTTPAdapter(pool_connections=16, pool_maxsize=16)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+    def _cache_path(self, system_prompt: str, user_message: str) -> Path:
+        key = hashlib.sha256(
+            f"{system_prompt}\x00{user_message}\x00{self.model}\x00{self.temperature}".encode("utf-8")
+        ).hexdigest()
+        return self.cache_dir / f"{key}.json"
+
+    def _call_api(self, system_prompt: str, user_message: str) -> Tuple[str, Optional[Dict]]:
+        """Return the model's raw reply and its parsed UserOperation.
+
+        Replies are served from the on-disk cache when possible. Only replies that
+        parse to a dict are cached, so a bad or truncated answer is retried next time.
+        """
+        cache_path = self._cache_path(system_prompt, user_message) if self.use_cache else None
+        if cache_path is not None and cache_path.exists():
+            raw = orjson.loads(cache_path.read_bytes())["content"]
+            return raw, _parse_userop_json(raw)
+
+        payload = {
+            "model": self.model,
+            "messages": [
+                {"role": "system", "content": system_prompt},
+                {"role": "user", "content": user_message},
+            ],
+            "temperature": self.temperature,
+            "max_tokens": 1024,
+        }
+        resp = self.session.post(
+            f"{self.base_url}/v1/chat/completions",
+            json=payload,
+            timeout=30,
+        )
+        resp.raise_for_status()
+        raw = resp.json()["choices"][0]["message"]["content"]
+        parsed = _parse_userop_json(raw)
+
+        if cache_path is not None and isinstance(parsed, dict):
+            # Write to a temp file first so a concurrent reader never sees a partial entry
+            fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix=".tmp")
+            with os.fdopen(fd, "wb") as f:
+                f.write(orjson.dumps({"content": raw}))
+            os.replace(tmp_path, cache_path)
+        return raw, parsed
+
     def generate(self, attack_type: Optional[str] = None) -> Dict:
         """Generate a single malformed UserOperation.
 
@@ -999,29 +1063,8 @@ class AttackGenerator:
             if attack_type
             else "Generate a malformed UserOperation that attempts an integer overflow in gas fields."
         )
-        headers = {
-            "Content-Type": "application/json",
-            "Authorization": f"Bearer {self.api_key}",
-        }
-        payload = {
-            "model": self.model,
-            "messages": [
-                {"role": "system", "content": SYSTEM_PROMPT_V1},
-                {"role": "user", "content": prompt},
-            ],
-            "temperature": self.temperature,
-            "max_tokens": 1024,
-        }
         try:
-            resp = requests.post(
-                f"{self.base_url}/v1/chat/completions",
-                headers=headers,
-                json=payload,
-                timeout=30,
-            )
-            resp.raise_for_status()
-            raw = resp.json()["choices"][0]["message"]["content"]
-            parsed = _parse_userop_json(raw)
+            raw, parsed = self._call_api(SYSTEM_PROMPT_V1, prompt)
             if parsed is not None:
                 return parsed
             return {
@@ -1054,6 +1097,7 @@ class BatchAttackGenerator:
         temperature: float = 0.9,
         prompt_version: str = "v4",
         seed: int = RANDOM_SEED,
+        concurrency: int = 8,
     ):
         self.api_key = api_key or os.getenv("DEEPSEEK_API_KEY")
         if not self.api_key:
@@ -1065,6 +1109,8 @@ class BatchAttackGenerator:
         self.max_retries = max_retries
         self.retry_delay = retry_delay
         self.temperature = temperature
+        # Maximum number of API requests in flight at once
+        self.concurrency = concurrency
         self.prompt_version = prompt_version
         self.seed = seed
         random.seed(seed)
@@ -1106,7 +1152,8 @@ class BatchAttackGenerator:
                 if resp.status == 200:
                     data = await resp.json()
                     return data["choices"][0]["message"]["content"], True
-                if resp.status == 429 and attempt < self.max_retries:
+                # Back off and retry on rate limits and transient server errors
+                if (resp.status == 429 or resp.status >= 500) and attempt < self.max_retries:
                     await asyncio.sleep(self.retry_delay * (2**attempt))
                     return await self._call_api(session, user_message, attempt + 1)
                 error_body = await resp.text()
@@ -1186,9 +1233,15 @@ class BatchAttackGenerator:
         print(
             f"Generating {count} attacks (prompt={self.prompt_version}, categories={len(set(types_seq))}, temperature={self.temperature})..."
         )
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def bounded(session: aiohttp.ClientSession, attack_type: str, index: int) -> Dict:
+            async with semaphore:
+                return await self._generate_one(session, attack_type, index)
+
         async with aiohttp.ClientSession() as session:
             tasks = [
-                self._generate_one(session, types_seq[i], i + 1)
+                bounded(session, types_seq[i], i + 1)
                 for i in range(count)
             ]
             return await asyncio.gather(*tasks)
@@ -1219,6 +1272,7 @@ class BatchAttackGenerator:
             },
             "attacks": normalized_attacks,
         }
+        # Stdlib json on purpose: AI-derived payloads may carry uint256-sized ints that orjson rejects
         Path(output_path).write_text(
             json.dumps(data, indent=2, ensure_ascii=False), encoding="utf-8"
         )
@@ -1287,27 +1341,34 @@ class AttackValidator:
     """
 
     COMMON_REQUIRED_FIELDS = {
-        "sender": {"pattern": r"^0x[a-fA-F0-9]{40}$"},
-        "nonce": {"pattern": r"^\d+$"},
-        "callData": {"pattern": r"^0x[a-fA-F0-9]*$"},
-        "preVerificationGas": {"pattern": r"^\d+$"},
-        "signature": {"pattern": r"^0x[a-fA-F0-9]*$"},
+        "sender": {"pattern": re.compile(r"^0x[a-fA-F0-9]{40}$")},
+        "nonce": {"pattern": re.compile(r"^\d+$")},
+        "callData": {"pattern": re.compile(r"^0x[a-fA-F0-9]*$")},
+        "preVerificationGas": {"pattern": re.compile(r"^\d+$")},
+        "signature": {"pattern": re.compile(r"^0x[a-fA-F0-9]*$")},
     }
     UNPACKED_REQUIRED_FIELDS = {
-        "callGasLimit": {"pattern": r"^\d+$"},
-        "verificationGasLimit": {"pattern": r"^\d+$"},
-        "maxFeePerGas": {"pattern": r"^\d+$"},
-        "maxPriorityFeePerGas": {"pattern": r"^\d+$"},
+        "callGasLimit": {"pattern": re.compile(r"^\d+$")},
+        "verificationGasLimit": {"pattern": re.compile(r"^\d+$")},
+        "maxFeePerGas": {"pattern": re.compile(r"^\d+$")},
+        "maxPriorityFeePerGas": {"pattern": re.compile(r"^\d+$")},
     }
     PACKED_REQUIRED_FIELDS = {
-        "accountGasLimits": {"pattern": r"^0x[a-fA-F0-9]+$"},
-        "gasFees": {"pattern": r"^0x[a-fA-F0-9]+$"},
+        "accountGasLimits": {"pattern": re.compile(r"^0x[a-fA-F0-9]+$")},
+        "gasFees": {"pattern": re.compile(r"^0x[a-fA-F0-9]+$")},
     }
     OPTIONAL_FIELDS = {
-        "initCode": {"pattern": r"^0x[a-fA-F0-9]*$"},
-        "paymasterAndData": {"pattern": r"^0x[a-fA-F0-9]*$"},
+        "initCode": {"pattern": re.compile(r"^0x[a-fA-F0-9]*$")},
+        "paymasterAndData": {"pattern": re.compile(r"^0x[a-fA-F0-9]*$")},
     }
 
+    KNOWN_FIELDS = frozenset(
+        set(COMMON_REQUIRED_FIELDS)
+        | set(UNPACKED_REQUIRED_FIELDS)
+        | set(PACKED_REQUIRED_FIELDS)
+        | set(OPTIONAL_FIELDS)
+    )
+
     def __init__(self, strict_mode: bool = True):
         self.strict_mode = strict_mode
 
@@ -1331,7 +1392,7 @@ class AttackValidator:
                 errors.append(f"{name}: expected str, got {type(val).__name__}")
                 field_issues[name] = [f"Wrong type: {type(val).__name__}"]
                 continue
-            if not re.match(spec["pattern"], val):
+            if not spec["pattern"].match(val):
                 errors.append(f"{name}: invalid format '{val}'")
                 field_issues.setdefault(name, []).append("Invalid format")
 
@@ -1349,7 +1410,7 @@ class AttackValidator:
                     errors.append(f"{name}: expected str, got {type(val).__name__}")
                     field_issues[name] = [f"Wrong type: {type(val).__name__}"]
                     continue
-                if not re.match(spec["pattern"], val):
+                if not spec["pattern"].match(val):
                     errors.append(f"{name}: invalid format '{val}'")
                     field_issues.setdefault(name, []).append("Invalid format")
         elif has_unpacked:
@@ -1363,7 +1424,7 @@ class AttackValidator:
                     errors.append(f"{name}: expected str, got {type(val).__name__}")
                     field_issues[name] = [f"Wrong type: {type(val).__name__}"]
                     continue
-                if not re.match(spec["pattern"], val):
+                if not spec["pattern"].match(val):
                     errors.append(f"{name}: invalid format '{val}'")
                     field_issues.setdefault(name, []).append("Invalid format")
         else:
@@ -1376,19 +1437,13 @@ class AttackValidator:
             val = userop.get(name)
             if val is None:
                 continue
-            if isinstance(val, str) and not re.match(spec["pattern"], val):
+            if isinstance(val, str) and not spec["pattern"].match(val):
                 errors.append(f"{name}: invalid format '{val}'")
                 field_issues.setdefault(name, []).append("Invalid format")
 
         # Unknown fields (strict mode)
         if self.strict_mode:
-            known = (
-                set(self.COMMON_REQUIRED_FIELDS)
-                | set(self.UNPACKED_REQUIRED_FIELDS)
-                | set(self.PACKED_REQUIRED_FIELDS)
-                | set(self.OPTIONAL_FIELDS)
-            )
-            unknown = set(userop.keys()) - known
+            unknown = userop.keys() - self.KNOWN_FIELDS
             if unknown:
                 warnings.append(f"Unknown fields: {unknown}")
                 for f in unknown:
@@ -1520,6 +1575,12 @@ examples:
         default=50,
         help="Number of attacks to generate in batch mode (default: 50)",
     )
+    p.add_argument(
+        "--concurrency",
+        type=int,
+        default=8,
+        help="Maximum concurrent API requests in batch mode (default: 8)",
+    )
     p.add_argument(
         "--output",
         default="attacks_dataset.json",
@@ -1535,6 +1596,15 @@ examples:
         action="store_true",
         help="Disable strict validation (allow unknown fields)",
     )
+    p.add_argument(
+        "--no-cache",
+        action="store_true",
+        help=(
+            "Always call the API in single mode instead of reusing cached responses "
+            "(by default a repeated prompt returns the identical cached attack, "
+            "despite the 0.7 sampling temperature)"
+        ),
+    )
     p.add_argument(
         "--prompt-version",
         choices=["v2", "v3", "v4"],
@@ -1564,7 +1634,7 @@ def main() -> None:
         if not api_key:
             print("Error: API key required. Set DEEPSEEK_API_KEY or pass --api-key.")
             return
-        gen = AttackGenerator(api_key=api_key)
+        gen = AttackGenerator(api_key=api_key, use_cache=not args.no_cache)
         print(f"Generating single attack (type={args.attack_type or 'default'})...")
         result = gen.generate(args.attack_type)
         print(json.dumps(result, indent=2, ensure_ascii=False))
@@ -1575,7 +1645,9 @@ def main() -> None:
             print("Error: API key required. Set DEEPSEEK_API_KEY or pass --api-key.")
             return
         prompt_ver = getattr(args, "prompt_version", "v4")
-        gen = BatchAttackGenerator(api_key=api_key, prompt_version=prompt_ver)
+        gen = BatchAttackGenerator(
+            api_key=api_key, prompt_version=prompt_ver, concurrency=args.concurrency
+        )
         attacks = asyncio.run(gen.generate_batch(count=args.count))
 
         # Prepend static samples (M3 paymaster + M4 extended) unless --no-static
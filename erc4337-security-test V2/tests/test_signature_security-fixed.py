@@ -1,53 +1,141 @@
-import json
-import pytest
+import csv
+import functools
+import hashlib
+import orjson
+import re
+import requests
+import threading
+import time
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from eth_account import Account, messages
 from web3 import Web3, exceptions
+from web3.datastructures import AttributeDict
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-import pandas as pd
-from datetime import datetime
+
+MASK128 = (1 << 128) - 1
+
+# Hardhat test accounts, derived once at import time
+_KEYS = {
+    'deployer': '0xac0974bec39a17e36ba4a6b4d238ff944bacb478cbed5efcae784d7bf4f2ff80',
+    'attacker': '0x59c6995e998f97a5a0044966f0945389dc9e86dae88c7a8412f4603b6b78690d',
+    'user': '0x5de4111afa1a4b94908f83103eb1f1706367c2e68ca870fc3fb9a804cdab365a'
+}
+_ACCOUNTS = {name: Account.from_key(key) for name, key in _KEYS.items()}
+
+# EntryPoint FailedOp(uint256,string) / FailedOpWithRevert(uint256,string,bytes) selectors
+_FAILED_OP_SELECTORS = ('0x220266b6', '0x65c8fd4d')
+
+# Signature fixtures shared by every run
+_ZERO_SIG = b'\x00' * 65
+_SHORT_SIGS = (
+    ('Empty signature', b''),
+    ('1 byte', b'\x01'),
+    ('32 bytes', b'\x01' * 32),
+    ('64 bytes', b'\x01' * 64),
+    ('66 bytes', b'\x01' * 66)  # 1 byte longer than standard signature
+)
+
+# Error messages that mean the node/contract rejected the operation, one pattern per handler.
+# Only the contract-revert pattern matches 'signature', so a local encoding error is no false pass.
+_REJECT_RE = re.compile(r'Invalid signature|Signature|revert|failed|denied')
+_GENERIC_REJECT_RE = re.compile(r'revert|denied|failed', re.IGNORECASE)
+_SHORT_SIG_REJECT_RE = re.compile(r'revert|failed', re.IGNORECASE)
+
+# Baseline signature for the invalid-v test, signed once; only its v byte is mutated
+_SIGNED_INVALID_V_MSG = _ACCOUNTS['user'].sign_message(messages.encode_defunct(text="ERC-4337 invalid-v test"))
+_SIGNED_INVALID_V_R = _SIGNED_INVALID_V_MSG.r.to_bytes(32, 'big')
+_SIGNED_INVALID_V_S = _SIGNED_INVALID_V_MSG.s.to_bytes(32, 'big')
 
 
 class SignatureSecurityTest:
     """Test smart contract wallet signature verification logic"""
     
+    # Contract objects shared across instances, keyed by (rpc_url, address, abi_hash)
+    _contract_cache = {}
+    
+    # Results directory written by save_results
+    _RESULTS_DIR = Path('data/results')
+    
+    # eth_gasPrice is near-constant on Hardhat, reuse a reading for this many seconds
+    GAS_PRICE_TTL = 1.0
+    
+    # Each test draws its UserOperation nonces from its own getNonce key (the upper 192 bits
+    # of the nonce), so concurrently running tests never share a nonce sequence
+    NONCE_KEYS = {
+        'zero_signature': 1,
+        'short_signature': 2,
+        'invalid_v_signature': 3,
+        'replay_attack': 4
+    }
+    
     def __init__(self, rpc_url="http://127.0.0.1:8545"):
-        # Connect to local node
-        self.w3 = Web3(Web3.HTTPProvider(rpc_url))
+        # Connect to local node over a pooled keep-alive session shared by all tests
+        self.rpc_url = rpc_url
+        self.session = requests.Session()
+        self.session.mount('http://', HTTPAdapter(
+            pool_connections=8,
+            pool_maxsize=16,
+            max_retries=Retry(total=2, backoff_factor=0.1)
+        ))
+        self.w3 = Web3(Web3.HTTPProvider(rpc_url, session=self.session, request_kwargs={'timeout': 10}))
         if not self.w3.is_connected():
             raise Exception("❌ Cannot connect to local node. Please ensure 'npx hardhat node' is running.")
         
-        # Load deployed contract information
-        with open(Path('data/deployments.json'), 'r') as f:
-            self.deployments = json.load(f)
+        # Load deployed contract information (parsed once per process)
+        self.deployments = self._load_deployments()
         
         # Initialize accounts (using Hardhat test accounts)
-        self.accounts = {
-            'deployer': Account.from_key('0xac0974bec39a17e36ba4a6b4d238ff944bacb478cbed5efcae784d7bf4f2ff80'),
-            'attacker': Account.from_key('0x59c6995e998f97a5a0044966f0945389dc9e86dae88c7a8412f4603b6b78690d'),
-            'user': Account.from_key('0x5de4111afa1a4b94908f83103eb1f1706367c2e68ca870fc3fb9a804cdab365a')
-        }
+        self.accounts = _ACCOUNTS
         
         # Initialize contract instances
-        self.entrypoint = self.w3.eth.contract(
-            address=self.deployments['contracts']['entryPoint']['address'],
-            abi=self.deployments['contracts']['entryPoint']['abi']
-        )
+        self.entrypoint = self._get_contract(rpc_url, 'entryPoint')
+        self.account = self._get_contract(rpc_url, 'simpleAccount')
         
-        self.account = self.w3.eth.contract(
-            address=self.deployments['contracts']['simpleAccount']['address'],
-            abi=self.deployments['contracts']['simpleAccount']['abi']
-        )
+        # Chain ID is immutable for the session
+        self.chain_id = self.w3.eth.chain_id
+        
+        self._gas_price = None
+        self._gas_price_ts = 0.0
+        
+        # Deployer transaction nonce, tracked locally for raw sends (None = re-read from node)
+        self._tx_nonce = None
+        self._tx_lock = threading.Lock()
+        
+        # callData is the same execute(attacker, 0, "") in every test, so encode it once
+        self._default_call_data = self.account.functions.execute(
+            self.accounts['attacker'].address, 0, b''
+        )._encode_transaction_data()
         
         print("=" * 60)
         print("🔒 ERC-4337 Signature Security Test Suite")
         print("=" * 60)
         print(f"Test Network: {rpc_url}")
-        print(f"Chain ID: {self.w3.eth.chain_id}")
+        print(f"Chain ID: {self.chain_id}")
         print(f"EntryPoint Address: {self.entrypoint.address}")
         print(f"Test Wallet Address: {self.account.address}")
         print(f"Wallet Owner: {self.accounts['user'].address}")
         print()
     
+    @classmethod
+    @functools.lru_cache(maxsize=1)
+    def _load_deployments(cls):
+        """Load data/deployments.json once per process"""
+        return orjson.loads(Path('data/deployments.json').read_bytes())
+    
+    def _get_contract(self, rpc_url, name):
+        """Get a contract instance, reusing one already built for the same address and ABI"""
+        info = self.deployments['contracts'][name]
+        abi_hash = hashlib.sha256(orjson.dumps(info['abi'])).hexdigest()
+        key = (rpc_url, info['address'], abi_hash)
+        
+        contract = self._contract_cache.get(key)
+        if contract is None:
+            contract = self.w3.eth.contract(address=info['address'], abi=info['abi'])
+            self._contract_cache[key] = contract
+        return contract
+    
     def get_account_nonce(self, account_address, key=0):
         """Get account nonce"""
         try:
@@ -60,14 +148,137 @@ class SignatureSecurityTest:
             # For testing purposes, return 0
             return 0
     
-    def pack_uint128_pair(self, a, b):
+    def get_gas_price(self):
+        """Get current gas price, reusing a value fetched within GAS_PRICE_TTL seconds"""
+        now = time.monotonic()
+        if self._gas_price is None or now - self._gas_price_ts > self.GAS_PRICE_TTL:
+            self._gas_price = self.w3.eth.gas_price
+            self._gas_price_ts = now
+        return self._gas_price
+    
+    def get_nonce_and_gas_price(self, account_address, key=0):
+        """Get account nonce and current gas price in a single JSON-RPC batch"""
+        if self._gas_price is not None and time.monotonic() - self._gas_price_ts <= self.GAS_PRICE_TTL:
+            # Gas price still fresh, only the nonce needs a round trip
+            return self.get_account_nonce(account_address, key), self._gas_price
+        
+        try:
+            with self.w3.batch_requests() as batch:
+                batch.add(self.entrypoint.functions.getNonce(account_address, key))
+                batch.add(self.w3.eth.gas_price)
+                nonce_value, gas_price = batch.execute()
+        except Exception:
+            # Node rejected the batch, fall back to separate requests
+            return self.get_account_nonce(account_address, key), self.get_gas_price()
+        
+        self._gas_price, self._gas_price_ts = gas_price, time.monotonic()
+        print(f"    Retrieved nonce: account={account_address[:10]}..., key={key}, nonce={nonce_value}")
+        return nonce_value, gas_price
+    
+    def wait_for_receipts(self, tx_hashes, poll_interval=0.05, timeout=120):
+        """Wait for several transactions, polling all pending receipts in one JSON-RPC batch"""
+        receipts = [None] * len(tx_hashes)
+        pending = [i for i, tx_hash in enumerate(tx_hashes) if tx_hash is not None]
+        deadline = time.monotonic() + timeout
+        
+        while pending:
+            try:
+                with self.w3.batch_requests() as batch:
+                    for i in pending:
+                        batch.add(self.w3.eth.get_transaction_receipt(tx_hashes[i]))
+                    fetched = batch.execute()
+            except Exception:
+                # Batch rejected or some receipt not available yet, query one by one
+                fetched = []
+                for i in pending:
+                    try:
+                        fetched.append(self.w3.eth.get_transaction_receipt(tx_hashes[i]))
+                    except exceptions.TransactionNotFound:
+                        fetched.append(None)
+            
+            still_pending = []
+            for i, receipt in zip(pending, fetched):
+                if receipt:
+                    receipts[i] = receipt
+                else:
+                    still_pending.append(i)
+            pending = still_pending
+            
+            if pending:
+                if time.monotonic() > deadline:
+                    raise exceptions.TimeExhausted(f"{len(pending)} transaction(s) not mined after {timeout} seconds")
+                time.sleep(poll_interval)
+        
+        return receipts
+    
+    def send_handle_ops(self, ops, beneficiary, gas):
+        """Sign handleOps locally and send it with its receipt lookup in one raw JSON-RPC batch.
+        
+        Returns (tx_hash, receipt); raises ContractLogicError if the node rejects the call.
+        """
+        deployer = self.accounts['deployer']
+        data = self.entrypoint.functions.handleOps(ops, beneficiary)._encode_transaction_data()
+        
+        # Hold the lock across signing and sending so concurrent tests never leave a nonce gap
+        with self._tx_lock:
+            if self._tx_nonce is None:
+                self._tx_nonce = self.w3.eth.get_transaction_count(deployer.address, 'pending')
+            
+            signed = deployer.sign_transaction({
+                'to': self.entrypoint.address,
+                'data': data,
+                'gas': gas,
+                'gasPrice': self.get_gas_price(),
+                'nonce': self._tx_nonce,
+                'chainId': self.chain_id,
+                'value': 0
+            })
+            tx_hash = signed.hash
+            
+            try:
+                # Hardhat mines on submission, so the receipt is normally ready in the same batch
+                response = self.session.post(self.rpc_url, json=[
+                    {'jsonrpc': '2.0', 'id': 1, 'method': 'eth_sendRawTransaction', 'params': [Web3.to_hex(signed.raw_transaction)]},
+                    {'jsonrpc': '2.0', 'id': 2, 'method': 'eth_getTransactionReceipt', 'params': [Web3.to_hex(tx_hash)]}
+                ], timeout=10)
+                replies = {reply['id']: reply for reply in orjson.loads(response.content)}
+            except Exception:
+                self._tx_nonce = None
+                raise
+            
+            error = replies[1].get('error')
+            if error:
+                # The node may or may not have consumed the nonce, re-read it next time
+                self._tx_nonce = None
+                revert_data = error.get('data')
+                if isinstance(revert_data, dict):
+                    revert_data = revert_data.get('data')
+                raise exceptions.ContractLogicError(error.get('message', 'execution reverted'), data=revert_data)
+            
+            self._tx_nonce += 1
+        
+        raw_receipt = replies[2].get('result')
+        if not raw_receipt:
+            # Not mined yet (e.g. automine disabled), fall back to polling
+            return tx_hash, self.wait_for_receipts([tx_hash])[0]
+        
+        receipt = AttributeDict({**raw_receipt, 'status': int(raw_receipt['status'], 16)})
+        return tx_hash, receipt
+    
+    @staticmethod
+    def _failed_op_index(error):
+        """Return the opIndex of a FailedOp revert, or None if the error is not one"""
+        data = getattr(error, 'data', None)
+        if isinstance(data, str) and data[:10] in _FAILED_OP_SELECTORS and len(data) >= 74:
+            return int(data[10:74], 16)
+        return None
+    
+    @staticmethod
+    @functools.lru_cache(maxsize=32)
+    def pack_uint128_pair(a, b):
         """Pack two uint128 values into a bytes32"""
-        # Ensure values are within uint128 range
-        a = a & ((1 << 128) - 1)
-        b = b & ((1 << 128) - 1)
         # a in lower 128 bits, b in higher 128 bits
-        packed = (b << 128) | a
-        return packed.to_bytes(32, 'big')
+        return (b & MASK128).to_bytes(16, 'big') + (a & MASK128).to_bytes(16, 'big')
     
     def create_packed_user_op(self, sender, nonce, initCode, callData, 
                              verificationGasLimit, callGasLimit, 
@@ -94,35 +305,38 @@ class SignatureSecurityTest:
             signature                # bytes signature
         )
     
-    def run_all_tests(self):
-        """Run all signature security tests"""
-        test_results = []
+    def run_all_tests(self, parallel=False):
+        """Run all signature security tests
+
+        parallel=True runs the four tests in threads. It is opt-in: the tests
+        share one Web3 provider (batch_requests() is not thread-isolated on every
+        web3>=6 release) and their progress output interleaves on the console.
+        """
+        tests = [
+            ("[Test 1/4] All-zero Signature Attack", self.test_zero_signature),
+            ("[Test 2/4] Short Signature Attack", self.test_short_signature),
+            ("[Test 3/4] Invalid v-value Signature", self.test_invalid_v_signature),
+            ("[Test 4/4] Transaction Replay Attack (same nonce)", self.test_replay_attack)
+        ]
         
         print("🧪 Starting security tests...\n")
         
-        # Test 1: All-zero signature attack
-        print("[Test 1/4] All-zero Signature Attack")
-        result1 = self.test_zero_signature()
-        test_results.append(result1)
-        print(f"   Result: {result1['status']} - {result1['description']}\n")
-        
-        # Test 2: Short signature attack  
-        print("[Test 2/4] Short Signature Attack")
-        result2 = self.test_short_signature()
-        test_results.append(result2)
-        print(f"   Result: {result2['status']} - {result2['description']}\n")
-        
-        # Test 3: Invalid v-value signature
-        print("[Test 3/4] Invalid v-value Signature")
-        result3 = self.test_invalid_v_signature()
-        test_results.append(result3)
-        print(f"   Result: {result3['status']} - {result3['description']}\n")
-        
-        # Test 4: Replay attack (same nonce)
-        print("[Test 4/4] Transaction Replay Attack (same nonce)")
-        result4 = self.test_replay_attack()
-        test_results.append(result4)
-        print(f"   Result: {result4['status']} - {result4['description']}\n")
+        if parallel:
+            # Every test fetches its own nonce and none of them consumes it, so they can run concurrently
+            with ThreadPoolExecutor(max_workers=len(tests)) as executor:
+                futures = [executor.submit(test) for _, test in tests]
+                test_results = [future.result() for future in futures]
+            
+            for (title, _), result in zip(tests, test_results):
+                print(title)
+                print(f"   Result: {result['status']} - {result['description']}\n")
+        else:
+            test_results = []
+            for title, test in tests:
+                print(title)
+                result = test()
+                test_results.append(result)
+                print(f"   Result: {result['status']} - {result['description']}\n")
         
         # Save test results
         self.save_results(test_results)
@@ -133,23 +347,20 @@ class SignatureSecurityTest:
         """Test 1: Check if all-zero signature passes validation"""
         print("   Purpose: Check if contract accepts all-zero invalid signature")
         
-        # Get current nonce
-        nonce = self.get_account_nonce(self.account.address, 0)
+        attacker_addr = self.accounts['attacker'].address
+        sender = self.account.address
+        nonce_key = self.NONCE_KEYS['zero_signature']
         
-        # Get gas price
-        gas_price = self.w3.eth.gas_price
+        # Get current nonce and gas price
+        nonce, gas_price = self.get_nonce_and_gas_price(sender, nonce_key)
         print(f"   Gas Price: {gas_price}")
         
         # Construct callData
-        callData = self.account.functions.execute(
-            self.accounts['attacker'].address,
-            0,
-            b''
-        )._encode_transaction_data()
+        callData = self._default_call_data
         
         # Create PackedUserOperation
         user_op = self.create_packed_user_op(
-            sender=self.account.address,
+            sender=sender,
             nonce=nonce,
             initCode=b'',
             callData=callData,
@@ -159,16 +370,12 @@ class SignatureSecurityTest:
             maxPriorityFeePerGas=gas_price,
             maxFeePerGas=gas_price,
             paymasterAndData=b'',
-            signature=b'\x00' * 65
+            signature=_ZERO_SIG
         )
         
         try:
             # Attempt to execute malicious operation
-            tx_hash = self.entrypoint.functions.handleOps([user_op], self.accounts['attacker'].address).transact({
-                'from': self.accounts['deployer'].address,
-                'gas': 1000000
-            })
-            receipt = self.w3.eth.wait_for_transaction_receipt(tx_hash)
+            tx_hash, receipt = self.send_handle_ops([user_op], attacker_addr, 1000000)
             
             if receipt.status == 1:
                 return {
@@ -189,7 +396,7 @@ class SignatureSecurityTest:
         except exceptions.ContractLogicError as e:
             error_msg = str(e)
             # Check for various rejection reasons
-            if any(keyword in error_msg for keyword in ['Invalid signature', 'Signature', 'revert', 'failed', 'denied']):
+            if _REJECT_RE.search(error_msg):
                 return {
                     'test': 'zero_signature',
                     'status': '✅ PASSED',
@@ -208,7 +415,7 @@ class SignatureSecurityTest:
         except Exception as e:
             error_msg = str(e)
             # Check if it's a rejection-type error
-            if 'revert' in error_msg.lower() or 'denied' in error_msg.lower() or 'failed' in error_msg.lower():
+            if _GENERIC_REJECT_RE.search(error_msg):
                 return {
                     'test': 'zero_signature',
                     'status': '✅ PASSED',
@@ -229,54 +436,75 @@ class SignatureSecurityTest:
         """Test 2: Various short signature attacks"""
         print("   Purpose: Check if contract can handle non-standard length signatures")
         
-        test_cases = [
-            ('Empty signature', b''),
-            ('1 byte', b'\x01'),
-            ('32 bytes', b'\x01' * 32),
-            ('64 bytes', b'\x01' * 64),
-            ('66 bytes', b'\x01' * 66)  # 1 byte longer than standard signature
-        ]
+        attacker_addr = self.accounts['attacker'].address
+        sender = self.account.address
+        nonce_key = self.NONCE_KEYS['short_signature']
         
-        results = []
-        nonce = self.get_account_nonce(self.account.address, 0)
+        test_cases = _SHORT_SIGS
         
-        # Get gas price
-        gas_price = self.w3.eth.gas_price
+        outcomes = {}
+        nonce, gas_price = self.get_nonce_and_gas_price(sender, nonce_key)
         
-        for name, signature in test_cases:
-            # Create PackedUserOperation
-            user_op = self.create_packed_user_op(
-                sender=self.account.address,
-                nonce=nonce,
-                initCode=b'',
-                callData=b'',
-                verificationGasLimit=200000,
-                callGasLimit=200000,
-                preVerificationGas=50000,
-                maxPriorityFeePerGas=gas_price,
-                maxFeePerGas=gas_price,
-                paymasterAndData=b'',
-                signature=signature
-            )
+        # Only the signature differs between cases, so pack the rest once
+        base_user_op = self.create_packed_user_op(
+            sender=sender,
+            nonce=nonce,
+            initCode=b'',
+            callData=b'',
+            verificationGasLimit=200000,
+            callGasLimit=200000,
+            preVerificationGas=50000,
+            maxPriorityFeePerGas=gas_price,
+            maxFeePerGas=gas_price,
+            paymasterAndData=b'',
+            signature=b''
+        )
+        
+        # Sweep all cases through a single handleOps bundle. EntryPoint reverts the whole
+        # bundle with FailedOp(opIndex, reason) at the first op failing validation, so that
+        # op is recorded as rejected and the rest are renumbered and resubmitted
+        remaining = list(test_cases)
+        while remaining:
+            ops = [
+                base_user_op[:1] + (nonce + i,) + base_user_op[2:-1] + (signature,)
+                for i, (_, signature) in enumerate(remaining)
+            ]
             
             try:
-                tx_hash = self.entrypoint.functions.handleOps([user_op], self.accounts['attacker'].address).transact({
-                    'from': self.accounts['deployer'].address,
-                    'gas': 500000
-                })
-                receipt = self.w3.eth.wait_for_transaction_receipt(tx_hash)
+                tx_hash, receipt = self.send_handle_ops(ops, attacker_addr, 500000 * len(ops))
+            except Exception as e:
+                op_index = self._failed_op_index(e)
+                if op_index is None or op_index >= len(remaining):
+                    # Not a per-op failure, classify what is left one transaction at a time
+                    break
+                name, _ = remaining.pop(op_index)
+                outcomes[name] = f'{name} rejected'
+                continue
+            
+            for name, _ in remaining:
+                outcomes[name] = f'{name} accepted' if receipt.status == 1 else f'{name} rejected'
+            remaining = []
+        
+        # Fallback: submit each remaining case on its own
+        for name, signature in remaining:
+            user_op = base_user_op[:-1] + (signature,)
+            
+            try:
+                _, receipt = self.send_handle_ops([user_op], attacker_addr, 500000)
                 
                 if receipt.status == 1:
-                    results.append(f'{name} accepted')
+                    outcomes[name] = f'{name} accepted'
                 else:
-                    results.append(f'{name} rejected')
+                    outcomes[name] = f'{name} rejected'
                     
             except Exception as e:
                 error_msg = str(e)
-                if 'revert' in error_msg.lower() or 'failed' in error_msg.lower():
-                    results.append(f'{name} rejected')
+                if _SHORT_SIG_REJECT_RE.search(error_msg):
+                    outcomes[name] = f'{name} rejected'
                 else:
-                    results.append(f'{name} failed: {error_msg[:50]}')
+                    outcomes[name] = f'{name} failed: {error_msg[:50]}'
+        
+        results = [outcomes[name] for name, _ in test_cases]
         
         # If any short signature was accepted, there is risk
         if any('accepted' in r for r in results):
@@ -300,29 +528,26 @@ class SignatureSecurityTest:
         """Test 3: Invalid signature v-value attack (v ≠ 27, 28)"""
         print("   Purpose: Check if contract validates signature v-value must be 27 or 28")
 
-        # Build a baseline signature and mutate v byte for on-chain verification path
-        message = messages.encode_defunct(text="ERC-4337 invalid-v test")
-        signed = self.accounts['user'].sign_message(message)
-        r = signed.r.to_bytes(32, 'big')
-        s = signed.s.to_bytes(32, 'big')
+        attacker_addr = self.accounts['attacker'].address
+        sender = self.account.address
+        nonce_key = self.NONCE_KEYS['invalid_v_signature']
+
+        # Reuse the baseline signature and mutate v byte for on-chain verification path
+        r = _SIGNED_INVALID_V_R
+        s = _SIGNED_INVALID_V_S
 
         # Invalid v values for ECDSA in this context
         invalid_v_values = [0, 1, 26, 29, 255]
         results = []
 
-        base_nonce = self.get_account_nonce(self.account.address, 0)
-        gas_price = self.w3.eth.gas_price
-        callData = self.account.functions.execute(
-            self.accounts['attacker'].address,
-            0,
-            b''
-        )._encode_transaction_data()
+        base_nonce, gas_price = self.get_nonce_and_gas_price(sender, nonce_key)
+        callData = self._default_call_data
 
         for i, invalid_v in enumerate(invalid_v_values):
             invalid_signature = r + s + bytes([invalid_v])
 
             user_op = self.create_packed_user_op(
-                sender=self.account.address,
+                sender=sender,
                 nonce=base_nonce + i,
                 initCode=b'',
                 callData=callData,
@@ -336,11 +561,7 @@ class SignatureSecurityTest:
             )
 
             try:
-                tx_hash = self.entrypoint.functions.handleOps([user_op], self.accounts['attacker'].address).transact({
-                    'from': self.accounts['deployer'].address,
-                    'gas': 1200000
-                })
-                receipt = self.w3.eth.wait_for_transaction_receipt(tx_hash)
+                tx_hash, receipt = self.send_handle_ops([user_op], attacker_addr, 1200000)
 
                 if receipt.status == 1:
                     results.append(f'v={invalid_v}: accepted')
@@ -375,18 +596,20 @@ class SignatureSecurityTest:
         """Test 4: Transaction replay attack (using same nonce)"""
         print("   Purpose: Check if contract nonce mechanism prevents transaction replay")
         
+        deployer_addr = self.accounts['deployer'].address
+        sender = self.account.address
+        nonce_key = self.NONCE_KEYS['replay_attack']
+        
         # Get initial nonce
-        initial_nonce = self.get_account_nonce(self.account.address, 0)
+        initial_nonce, gas_price = self.get_nonce_and_gas_price(sender, nonce_key)
         print(f"   Initial nonce: {initial_nonce}")
         
         # Verify nonce mechanism core: invalid transactions should not consume nonce
         print("   Verify nonce mechanism core: invalid transactions should not consume nonce")
         
-        gas_price = self.w3.eth.gas_price
-        
         # Create invalid UserOperation (all-zero signature)
         invalid_user_op = self.create_packed_user_op(
-            sender=self.account.address,
+            sender=sender,
             nonce=initial_nonce,
             initCode=b'',
             callData=b'',
@@ -396,16 +619,12 @@ class SignatureSecurityTest:
             maxPriorityFeePerGas=gas_price,
             maxFeePerGas=gas_price,
             paymasterAndData=b'',
-            signature=b'\x00' * 65  # Invalid signature
+            signature=_ZERO_SIG  # Invalid signature
         )
         
         try:
             print("   Attempting to execute invalid UserOperation...")
-            tx_hash = self.entrypoint.functions.handleOps([invalid_user_op], self.accounts['deployer'].address).transact({
-                'from': self.accounts['deployer'].address,
-                'gas': 1500000
-            })
-            receipt = self.w3.eth.wait_for_transaction_receipt(tx_hash)
+            tx_hash, receipt = self.send_handle_ops([invalid_user_op], deployer_addr, 1500000)
             
             if receipt.status == 1:
                 # Should not happen - invalid signature accepted
@@ -423,7 +642,7 @@ class SignatureSecurityTest:
             print(f"   Invalid transaction execution failed (expected): {error_msg[:100]}")
         
         # Check if nonce remains unchanged
-        final_nonce = self.get_account_nonce(self.account.address, 0)
+        final_nonce = self.get_account_nonce(sender, nonce_key)
         print(f"   Nonce after failed transaction: {final_nonce}")
         
         # Verify results
@@ -434,11 +653,7 @@ class SignatureSecurityTest:
             # Attempt to replay the same invalid transaction
             print("   Attempting to replay the same invalid transaction...")
             try:
-                tx_hash2 = self.entrypoint.functions.handleOps([invalid_user_op], self.accounts['deployer'].address).transact({
-                    'from': self.accounts['deployer'].address,
-                    'gas': 1500000
-                })
-                receipt2 = self.w3.eth.wait_for_transaction_receipt(tx_hash2)
+                tx_hash2, receipt2 = self.send_handle_ops([invalid_user_op], deployer_addr, 1500000)
                 
                 if receipt2.status == 1:
                     return {
@@ -455,7 +670,7 @@ class SignatureSecurityTest:
                 print(f"   Replay transaction failed (expected): {error_msg[:100]}")
             
             # Final verification: nonce still remains unchanged
-            final_nonce_after_replay = self.get_account_nonce(self.account.address, 0)
+            final_nonce_after_replay = self.get_account_nonce(sender, nonce_key)
             print(f"   Nonce after replay attempt: {final_nonce_after_replay}")
             
             if final_nonce_after_replay == initial_nonce:
@@ -486,16 +701,15 @@ class SignatureSecurityTest:
     def save_results(self, test_results):
         """Save test results to file"""
         # Create results directory
-        results_dir = Path('data/results')
-        results_dir.mkdir(exist_ok=True)
+        results_dir = self._RESULTS_DIR
+        results_dir.mkdir(parents=True, exist_ok=True)
         
         # Generate timestamp
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        timestamp = time.strftime("%Y%m%d_%H%M%S")
         
         # Save as JSON
         json_path = results_dir / f'signature_tests_{timestamp}.json'
-        with open(json_path, 'w') as f:
-            json.dump(test_results, f, indent=2)
+        json_path.write_bytes(orjson.dumps(test_results, option=orjson.OPT_INDENT_2))
         
         # Save as CSV (for analysis)
         csv_data = []
@@ -507,10 +721,11 @@ class SignatureSecurityTest:
                 'description': result['description']
             })
         
-        if csv_data:
-            df = pd.DataFrame(csv_data)
-            csv_path = results_dir / f'signature_tests_{timestamp}.csv'
-            df.to_csv(csv_path, index=False)
+        csv_path = results_dir / f'signature_tests_{timestamp}.csv'
+        with open(csv_path, 'w', newline='', encoding='utf-8') as f:
+            writer = csv.DictWriter(f, fieldnames=['test_name', 'status', 'severity', 'description'])
+            writer.writeheader()
+            writer.writerows(csv_data)
         
         print("=" * 60)
         print("📊 Test Results Summary")
@@ -521,8 +736,7 @@ class SignatureSecurityTest:
         
         print(f"\n📁 Detailed results saved to:")
         print(f"   {json_path}")
-        if csv_data:
-            print(f"   {csv_path}")
+        print(f"   {csv_path}")
         
         # Statistics
         total = len(test_results)
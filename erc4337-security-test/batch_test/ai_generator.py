@@ -1,8 +1,8 @@
-import random
+import numpy as np
 from dataclasses import dataclass, asdict
 from typing import List, Dict, Any, Optional
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class AttackVector:
     """
     Standardized data structure for an attack vector.
@@ -18,6 +18,10 @@ class AttackVector:
     # Malicious signature payload (bytes)
     signature: Optional[bytes] = None
     
+    # Sign with the real owner key, then submit the high-s twin (r, n - s, v ^ 1) of that
+    # signature. The op hash depends on nonce and gas, so the runner derives it per op.
+    malleable_signature: bool = False
+    
     # Offset from the current valid nonce. 
     # 0 = valid nonce, -1 = replay attack (previous nonce), 1 = future nonce (gap)
     nonce_offset: int = 0
@@ -50,6 +54,27 @@ Focus on the following vulnerabilities:
 Output format: JSON list of attack vectors matching the AttackVector schema.
 """
 
+# Value pools MockGenerator draws from
+SIG_SUBTYPES = ('zero', 'short', 'empty', 'malleable')
+GAS_FACTORS = [0.1, 0.5, 2.0, 10.0]
+
+# Signature builders, indexed by the position of the subtype in SIG_SUBTYPES.
+# Each takes the short-signature length and returns (signature, description).
+def _build_zero(length: int):
+    return b'\x00' * 65, "All-zero signature (65 bytes) - Testing ecrecover(0) vulnerability"
+
+def _build_short(length: int):
+    return b'\x01' * length, f"Short signature ({length} bytes) - Testing length validation"
+
+def _build_empty(length: int):
+    return b'', "Empty signature (0 bytes) - Testing missing check"
+
+def _build_malleable(length: int):
+    # No fixed payload: BatchRunner signs the op hash with the owner key and flips it (malleable_signature)
+    return None, "Malleable signature (r, n-s, v^1) - Testing low-s enforcement"
+
+_SIG_BUILDERS = (_build_zero, _build_short, _build_empty, _build_malleable)
+
 class MockGenerator:
     """
     [Fuzzing Module]
@@ -71,48 +96,38 @@ class MockGenerator:
         Returns:
             List[AttackVector]: A list of malicious inputs ready for execution.
         """
+        # Draw all randomness for the batch up front in a few vectorized calls,
+        # then only index into the arrays while building the vectors
+        rng = np.random.default_rng()
+        # Weighted random choice to focus on signature attacks (most critical for M1)
+        # 0 = signature_forgery, 1 = replay, 2 = gas_exhaustion
+        attack_types = rng.choice(3, size=count, p=[0.6, 0.2, 0.2])
+        sig_subtypes = rng.integers(0, len(SIG_SUBTYPES), size=count)
+        short_lengths = rng.integers(1, 65, size=count)
+        gas_factors = rng.choice(GAS_FACTORS, size=count)
+        
         attacks = []
         for i in range(count):
-            # Weighted random choice to focus on signature attacks (most critical for M1)
-            attack_type = random.choices(
-                ['signature_forgery', 'replay', 'gas_exhaustion'],
-                weights=[0.6, 0.2, 0.2],
-                k=1
-            )[0]
-            
-            if attack_type == 'signature_forgery':
-                attacks.append(self._generate_signature_attack(i))
-            elif attack_type == 'replay':
+            attack_type = attack_types[i]
+            if attack_type == 0:
+                attacks.append(self._generate_signature_attack(
+                    i, sig_subtypes[i], int(short_lengths[i])
+                ))
+            elif attack_type == 1:
                 attacks.append(self._generate_replay_attack(i))
-            elif attack_type == 'gas_exhaustion':
-                attacks.append(self._generate_gas_attack(i))
+            else:
+                attacks.append(self._generate_gas_attack(i, float(gas_factors[i])))
                 
         return attacks
 
-    def _generate_signature_attack(self, index: int) -> AttackVector:
-        subtype = random.choice(['zero', 'short', 'empty', 'invalid_v'])
-        
-        if subtype == 'zero':
-            sig = b'\x00' * 65
-            desc = "All-zero signature (65 bytes) - Testing ecrecover(0) vulnerability"
-        elif subtype == 'short':
-            length = random.randint(1, 64)
-            sig = b'\x01' * length
-            desc = f"Short signature ({length} bytes) - Testing length validation"
-        elif subtype == 'empty':
-            sig = b''
-            desc = "Empty signature (0 bytes) - Testing missing check"
-        else: # invalid_v
-            # Construct a signature with invalid v (not 27 or 28)
-            # Standard signature is 65 bytes: r(32) + s(32) + v(1)
-            sig = b'\x01' * 64 + bytes([random.choice([0, 1, 26, 29, 255])])
-            desc = "Signature with invalid v value - Testing ECDSA recovery logic"
-            
+    def _generate_signature_attack(self, index: int, subtype: int, length: int) -> AttackVector:
+        sig, desc = _SIG_BUILDERS[subtype](length)
         return AttackVector(
-            name=f"SigAttack_{index}_{subtype}",
+            name=f"SigAttack_{index}_{SIG_SUBTYPES[subtype]}",
             description=desc,
             attack_type="signature_forgery",
-            signature=sig
+            signature=sig,
+            malleable_signature=SIG_SUBTYPES[subtype] == 'malleable'
         )
 
     def _generate_replay_attack(self, index: int) -> AttackVector:
@@ -123,8 +138,7 @@ class MockGenerator:
             nonce_offset=-1 
         )
 
-    def _generate_gas_attack(self, index: int) -> AttackVector:
-        factor = random.choice([0.1, 0.5, 2.0, 10.0])
+    def _generate_gas_attack(self, index: int, factor: float) -> AttackVector:
         return AttackVector(
             name=f"GasAttack_{index}",
             description=f"Modified gas limits by factor {factor}",
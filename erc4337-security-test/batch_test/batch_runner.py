@@ -1,14 +1,84 @@
+import functools
 import json
-import time
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from pathlib import Path
 from typing import List, Dict, Any
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from eth_abi import encode
+from eth_utils import keccak
+from hexbytes import HexBytes
 from web3 import Web3, exceptions
+from web3.logs import DISCARD
 from eth_account import Account, messages
-from .config import RPC_URL, DEPLOYMENTS_PATH
+from .config import RPC_URL, DEPLOYMENTS_PATH, REPORTS_DIR, BATCH_SIZE, BATCH_TX_GAS, MAX_WORKERS, POLL_LATENCY
 from .ai_generator import AttackVector
 
+# Order of the secp256k1 curve
+SECP256K1_N = 0xFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFEBAAEDCE6AF48A03BBFD25E8CD0364141
+
+# keccak256 of empty bytes (0xc5d24601...), the hash of initCode/paymasterAndData in almost every op
+EMPTY_BYTES_HASH = keccak(b'')
+
+@functools.lru_cache(maxsize=16)
+def _bytes_hash(data) -> bytes:
+    """keccak256 of a dynamic bytes field; memoized since the fuzzer reuses the same few values"""
+    if not data:
+        return EMPTY_BYTES_HASH
+    return keccak(HexBytes(data))
+
+def get_user_op_hash(op) -> bytes:
+    """
+    Local equivalent of SimpleEntryPoint.getUserOpHash.
+    
+    The contract function is pure, so hashing in-process gives the same bytes32 without
+    an eth_call per op.
+    """
+    (sender, nonce, init_code, call_data, call_gas, verification_gas, pre_verification_gas,
+     max_fee, max_priority_fee, paymaster_and_data, _signature) = op
+    return keccak(encode(
+        ['address', 'uint256', 'bytes32', 'bytes32', 'uint256', 'uint256', 'uint256', 'uint256', 'uint256', 'bytes32'],
+        [
+            sender, nonce,
+            _bytes_hash(init_code), _bytes_hash(call_data),
+            call_gas, verification_gas, pre_verification_gas,
+            max_fee, max_priority_fee,
+            _bytes_hash(paymaster_and_data)
+        ]
+    ))
+
+@functools.lru_cache(maxsize=64)
+def gas_limits(call_gas_factor: float, verification_gas_factor: float) -> tuple:
+    """(callGasLimit, verificationGasLimit) for a pair of gas factors, computed once per unique pair"""
+    return int(200000 * call_gas_factor), int(100000 * verification_gas_factor)
+
+# Contract objects shared by every BatchRunner in the process, keyed by (name, deployments mtime)
+_CONTRACTS: Dict[tuple, Any] = {}
+
+@functools.lru_cache(maxsize=1)
+def _load_deployments_cached(path: str, mtime: float) -> Dict[str, Any]:
+    """Parse deployments.json once per file version (mtime is part of the cache key)"""
+    with open(path, 'r') as f:
+        return json.load(f)
+
+def _make_web3() -> Web3:
+    """Web3 over a pooled keep-alive HTTP session instead of a fresh connection per request"""
+    session = requests.Session()
+    session.headers['Connection'] = 'keep-alive'
+    session.mount('http://', HTTPAdapter(
+        pool_connections=32,
+        pool_maxsize=32,
+        max_retries=Retry(total=3, backoff_factor=0.05)
+    ))
+    return Web3(Web3.HTTPProvider(RPC_URL, session=session, request_kwargs={'timeout': 30}))
+
 class BatchRunner:
     def __init__(self):
-        self.w3 = Web3(Web3.HTTPProvider(RPC_URL))
+        self.w3 = _make_web3()
         if not self.w3.is_connected():
             raise ConnectionError(f"Cannot connect to Hardhat node at {RPC_URL}")
             
@@ -16,59 +86,242 @@ class BatchRunner:
         self._init_contracts()
         self._init_accounts()
         
+        # callData is the same execute(attacker, 0, "") for every attack, so encode it once
+        self._default_call_data = self.account.functions.execute(
+            self.attacker.address,
+            0,
+            b''
+        )._encode_transaction_data()
+        
+        # Snapshotted once per batch; the nonce is then tracked locally as ops succeed
+        self._cached_gas_price = None
+        self._base_nonce = None
+        
+        # Per-thread Web3 connections for the concurrent dry runs
+        self._local = threading.local()
+        
     def _load_deployments(self):
         if not DEPLOYMENTS_PATH.exists():
             raise FileNotFoundError(f"Deployments file not found at {DEPLOYMENTS_PATH}")
-        with open(DEPLOYMENTS_PATH, 'r') as f:
-            self.deployments = json.load(f)
+        self._deployments_mtime = os.path.getmtime(DEPLOYMENTS_PATH)
+        self.deployments = _load_deployments_cached(str(DEPLOYMENTS_PATH), self._deployments_mtime)
             
     def _init_contracts(self):
-        self.entrypoint = self.w3.eth.contract(
-            address=self.deployments['contracts']['entryPoint']['address'],
-            abi=self.deployments['contracts']['entryPoint']['abi']
-        )
-        self.account = self.w3.eth.contract(
-            address=self.deployments['contracts']['simpleAccount']['address'],
-            abi=self.deployments['contracts']['simpleAccount']['abi']
-        )
+        self.entrypoint = self._get_contract('entryPoint')
+        self.account = self._get_contract('simpleAccount')
+
+    def _get_contract(self, name: str):
+        """Build the contract object once per deployment file version and reuse it"""
+        key = (name, self._deployments_mtime)
+        contract = _CONTRACTS.get(key)
+        if contract is None:
+            contract = self.w3.eth.contract(
+                address=self.deployments['contracts'][name]['address'],
+                abi=self.deployments['contracts'][name]['abi']
+            )
+            _CONTRACTS[key] = contract
+        return contract
         
     def _init_accounts(self):
         # Hardhat default accounts
         self.deployer = Account.from_key('0xac0974bec39a17e36ba4a6b4d238ff944bacb478cbed5efcae784d7bf4f2ff80')
         self.attacker = Account.from_key('0x59c6995e998f97a5a0044966f0945389dc9e86dae88c7a8412f4603b6b78690d')
         self.user = Account.from_key('0x5de4111afa1a4b94908f83103eb1f1706367c2e68ca870fc3fb9a804cdab365a')
+        # deploy_contracts.py makes Hardhat account #1 the SimpleAccount owner
+        self.owner = self.attacker
 
-    def execute_batch(self, attacks: List[AttackVector]) -> List[Dict[str, Any]]:
-        results = []
+    def _sign_user_op(self, op, malleable: bool = False) -> bytes:
+        """
+        Owner signature r(32) + s(32) + v(1) over the op hash, as SimpleAccount.validateUserOp recovers it.
+        
+        With malleable=True the high-s twin (r, n - s, v ^ 1) is returned instead. It recovers
+        the same owner, so only a contract that enforces low-s rejects it.
+        """
+        sig = self.owner._key_obj.sign_msg_hash(get_user_op_hash(op))
+        s, v = sig.s, sig.v
+        if malleable:
+            s, v = SECP256K1_N - s, v ^ 1
+        return sig.r.to_bytes(32, 'big') + s.to_bytes(32, 'big') + bytes([v + 27])
+
+    def execute_batch(self, attacks: List[AttackVector]) -> Path:
+        """
+        Run all attacks and stream each result as one JSON line to REPORTS_DIR/raw_{ts}.jsonl.
+        
+        Results are written group by group instead of being collected into one list,
+        so memory stays flat for large fuzz campaigns. Returns the path of the JSONL file.
+        """
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        results_path = REPORTS_DIR / f'raw_{timestamp}.jsonl'
         print(f"🚀 Starting batch execution of {len(attacks)} attacks...")
+        self._snapshot_chain_state()
         
-        for i, attack in enumerate(attacks):
-            print(f"[{i+1}/{len(attacks)}] Executing {attack.name}: {attack.description}")
-            result = self._execute_single_attack(attack)
-            results.append(result)
-            # Small delay to prevent nonce race conditions if we were sending valid txs rapidly
-            # (though for attacks we expect reverts)
-            time.sleep(0.1)
+        done = 0
+        with open(results_path, 'w', encoding='utf-8') as f:
+            for group in self._group_attacks(attacks):
+                for i, attack in enumerate(group, start=done + 1):
+                    print(f"[{i}/{len(attacks)}] Executing {attack.name}: {attack.description}")
+                for result in self._execute_group(group):
+                    f.write(json.dumps(result) + '\n')
+                done += len(group)
             
+        return results_path
+
+    def _snapshot_chain_state(self):
+        """Fetch gas price and the account's EntryPoint nonce once for the whole batch"""
+        self._cached_gas_price = self.w3.eth.gas_price
+        self._base_nonce = self.entrypoint.functions.nonces(self.account.address).call()
+
+    @staticmethod
+    def _group_attacks(attacks: List[AttackVector]) -> List[List[AttackVector]]:
+        """
+        Split attacks into handleOps bundles of at most BATCH_SIZE ops.
+        
+        An attack with a nonce offset (replay or gap) fails the EntryPoint's nonce check by
+        construction, and one failing op reverts the whole bundle. Such an attack closes the
+        current bundle and runs in a group of its own, where the dry run settles it without
+        a transaction.
+        """
+        groups = []
+        group = []
+        for attack in attacks:
+            if attack.nonce_offset:
+                if group:
+                    groups.append(group)
+                    group = []
+                groups.append([attack])
+                continue
+            if len(group) >= BATCH_SIZE:
+                groups.append(group)
+                group = []
+            group.append(attack)
+        if group:
+            groups.append(group)
+        return groups
+
+    def _execute_group(self, group: List[AttackVector]) -> List[Dict[str, Any]]:
+        """
+        Submit a whole group as one handleOps([op1, op2, ...]) transaction.
+        
+        The EntryPoint reverts the entire bundle on the first failing op, so if the
+        bundle does not go through every attack is re-run on its own.
+        """
+        if len(group) == 1:
+            return [self._execute_single_attack(group[0])]
+        
+        try:
+            ops = self._build_ops(group)
+            
+            tx_hash = self.entrypoint.functions.handleOps(ops, self.attacker.address).transact({
+                'from': self.deployer.address,
+                'gas': BATCH_TX_GAS
+            })
+            receipt = self.w3.eth.wait_for_transaction_receipt(tx_hash, poll_latency=POLL_LATENCY)
+        except Exception:
+            receipt = None
+        
+        if receipt is None or receipt.status != 1:
+            return self._execute_attacks(group)
+        
+        # Correlate UserOperationHandled logs back to the attacks by nonce
+        handled = {
+            event['args']['nonce']: event['args']['success']
+            for event in self.entrypoint.events.UserOperationHandled().process_receipt(receipt, errors=DISCARD)
+        }
+        self._base_nonce += sum(1 for success in handled.values() if success)
+        results = []
+        for attack, op in zip(group, ops):
+            success = handled.get(op[1], False)
+            results.append({
+                'name': attack.name,
+                'type': attack.attack_type,
+                'status': 'VULNERABLE' if success else 'BLOCKED',
+                'description': attack.description,
+                'tx_hash': tx_hash.hex(),
+                'error': None if success else 'UserOperation not handled in bundle'
+            })
         return results
 
-    def _execute_single_attack(self, attack: AttackVector) -> Dict[str, Any]:
+    def _thread_entrypoint(self):
+        """EntryPoint contract bound to a Web3 connection owned by the calling thread"""
+        entrypoint = getattr(self._local, 'entrypoint', None)
+        if entrypoint is None:
+            w3 = _make_web3()
+            entrypoint = w3.eth.contract(address=self.entrypoint.address, abi=self.entrypoint.abi)
+            self._local.entrypoint = entrypoint
+        return entrypoint
+
+    def _dry_run(self, attack: AttackVector):
+        """eth_call handleOps([op]) against current state; returns the raised exception, or None if it passes"""
+        try:
+            op = self._construct_user_op(attack)
+            self._thread_entrypoint().functions.handleOps([op], self.attacker.address).call({
+                'from': self.deployer.address
+            })
+        except Exception as e:
+            return e
+        return None
+
+    def _execute_attacks(self, attacks: List[AttackVector]) -> List[Dict[str, Any]]:
+        """
+        Same outcome as executing the attacks one by one, with the dry runs done concurrently.
+        
+        An op that fails leaves chain state untouched, so every attack before the first dry
+        run that passes is settled without a transaction. From that attack on, state (the
+        nonce) may change, so the rest is executed for real in order.
+        """
+        with ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
+            errors = list(executor.map(self._dry_run, attacks))
+        
+        results = []
+        for i, (attack, error) in enumerate(zip(attacks, errors)):
+            if error is None:
+                results.append(self._execute_single_attack(attack, dry_run=False))
+                results.extend(self._execute_single_attack(a) for a in attacks[i + 1:])
+                break
+            results.append(self._failure_result(attack, error))
+        return results
+
+    @staticmethod
+    def _failure_result(attack: AttackVector, e: Exception, tx_hash=None) -> Dict[str, Any]:
+        if isinstance(e, exceptions.ContractLogicError):
+            # This is the most common outcome for a blocked attack (revert with reason)
+            status = 'BLOCKED'
+        else:
+            status = 'ERROR' # Test execution error
+        return {
+            'name': attack.name,
+            'type': attack.attack_type,
+            'status': status,
+            'description': attack.description,
+            'tx_hash': tx_hash,
+            'error': str(e)
+        }
+
+    def _execute_single_attack(self, attack: AttackVector, dry_run: bool = True) -> Dict[str, Any]:
         try:
             # 1. Prepare UserOperation
             op = self._construct_user_op(attack)
             
-            # 2. Send Transaction
+            # 2. Dry run with eth_call: an op that reverts here would revert on-chain too,
+            # so it is classified as BLOCKED without mining a transaction
+            if dry_run:
+                self.entrypoint.functions.handleOps([op], self.attacker.address).call({
+                    'from': self.deployer.address
+                })
+            
+            # 3. Send Transaction
             # We call handleOps from the attacker's address
             tx_hash = self.entrypoint.functions.handleOps([op], self.attacker.address).transact({
                 'from': self.deployer.address, # Using deployer to pay for gas to submit the tx
                 'gas': 5000000
             })
             
-            # 3. Wait for Receipt
-            receipt = self.w3.eth.wait_for_transaction_receipt(tx_hash)
+            # 4. Wait for Receipt
+            receipt = self.w3.eth.wait_for_transaction_receipt(tx_hash, poll_latency=POLL_LATENCY)
             
-            # 4. Analyze Result
+            # 5. Analyze Result
             if receipt.status == 1:
+                self._base_nonce += 1
                 return {
                     'name': attack.name,
                     'type': attack.attack_type,
@@ -87,70 +340,52 @@ class BatchRunner:
                     'error': 'Transaction reverted (status 0)'
                 }
                 
-        except exceptions.ContractLogicError as e:
-            # This is the most common outcome for a blocked attack (revert with reason)
-            return {
-                'name': attack.name,
-                'type': attack.attack_type,
-                'status': 'BLOCKED',
-                'description': attack.description,
-                'tx_hash': None,
-                'error': str(e)
-            }
         except Exception as e:
-            return {
-                'name': attack.name,
-                'type': attack.attack_type,
-                'status': 'ERROR', # Test execution error
-                'description': attack.description,
-                'tx_hash': None,
-                'error': str(e)
-            }
+            return self._failure_result(attack, e)
 
-    def _construct_user_op(self, attack: AttackVector):
-        # Get current nonce
-        current_nonce = self.entrypoint.functions.nonces(self.account.address).call()
-        
-        # Apply nonce offset (for replay attacks)
-        nonce = current_nonce + attack.nonce_offset
+    def _construct_user_op(self, attack: AttackVector, seq_index: int = 0):
+        return self._build_ops([attack], seq_index)[0]
+
+    def _build_ops(self, attacks: List[AttackVector], start: int = 0) -> List[tuple]:
+        """
+        Build the UserOperation tuples for a run of consecutive attacks.
         
-        # Default gas values
-        call_gas = int(200000 * attack.call_gas_limit_factor)
-        verification_gas = int(100000 * attack.verification_gas_limit_factor)
+        Everything that is the same for every op (sender, gas price, call data) is looked up
+        once, so the loop only does the per-attack nonce, gas and signature work.
+        """
+        if self._base_nonce is None:
+            self._snapshot_chain_state()
+        gas_price = self._cached_gas_price
+        base_nonce = self._base_nonce
+        sender = self.account.address
+        # CallData (execute function), pre-encoded in __init__
+        call_data = self._default_call_data
         
-        # Construct CallData (execute function)
-        call_data = self.account.functions.execute(
-            self.attacker.address,
-            0,
-            b''
-        )._encode_transaction_data()
-        
-        # Determine signature
-        if attack.signature is not None:
-            signature = attack.signature
-        else:
-            # Valid signature for baseline
-            msg_hash = self.entrypoint.functions.getUserOpHash((
-                self.account.address, nonce, b'', call_data,
-                call_gas, verification_gas, 21000,
-                self.w3.eth.gas_price, self.w3.eth.gas_price,
-                b'', b'' # Empty signature for hash calculation
-            )).call()
-            # This is a simplification; normally we'd sign the hash. 
-            # But for fuzzing, we usually provide explicit signatures in the attack vector.
-            # If no signature provided, we default to empty (which is an attack in itself)
-            signature = b''
-
-        return (
-            self.account.address,
-            nonce,
-            b'',          # initCode
-            call_data,
-            call_gas,
-            verification_gas,
-            21000,        # preVerificationGas
-            self.w3.eth.gas_price,
-            self.w3.eth.gas_price,
-            b'',          # paymasterAndData
-            signature
-        )
+        ops = []
+        for seq_index, attack in enumerate(attacks, start):
+            # Default gas values scaled by the attack's factors (cached per unique factor pair)
+            call_gas, verification_gas = gas_limits(attack.call_gas_limit_factor, attack.verification_gas_limit_factor)
+            
+            op = (
+                sender,
+                # Expected nonce for the op's position in its bundle, plus offset (for replay attacks)
+                base_nonce + seq_index + attack.nonce_offset,
+                b'',          # initCode
+                call_data,
+                call_gas,
+                verification_gas,
+                21000,        # preVerificationGas
+                gas_price,
+                gas_price,
+                b'',          # paymasterAndData
+                b''           # signature (not part of the op hash)
+            )
+            
+            # Determine signature: the attack's payload, or an owner signature over this op
+            # (valid for a baseline op, its malleable twin for a malleability attack)
+            if attack.signature is not None:
+                signature = attack.signature
+            else:
+                signature = self._sign_user_op(op, attack.malleable_signature)
+            ops.append(op[:-1] + (signature,))
+        return ops
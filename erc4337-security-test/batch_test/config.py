@@ -19,3 +19,15 @@ REPORTS_DIR.mkdir(parents=True, exist_ok=True)
 
 # Hardhat RPC URL
 RPC_URL = "http://127.0.0.1:8545"
+
+# Attacks submitted per handleOps bundle
+BATCH_SIZE = 20
+
+# Gas limit for a bundled handleOps transaction (below Hardhat's 30M block gas limit)
+BATCH_TX_GAS = 25_000_000
+
+# Concurrent dry runs (eth_call) when a bundle has to be split up
+MAX_WORKERS = 16
+
+# Receipt polling interval in seconds (Hardhat automines, so receipts are ready almost immediately)
+POLL_LATENCY = 0.01
@@ -1,41 +1,94 @@
-import pandas as pd
-import matplotlib.pyplot as plt
+import csv
+import json
+from collections import Counter
 from datetime import datetime
-from typing import List, Dict, Any
+from pathlib import Path
 from .config import REPORTS_DIR
 
+# Columns of a BatchRunner result record
+FIELDNAMES = ['name', 'type', 'status', 'description', 'tx_hash', 'error']
+
+# Number of distinct blocking reasons shown in the bar chart
+TOP_REASONS = 20
+
 class Visualizer:
-    def __init__(self, results: List[Dict[str, Any]]):
-        self.df = pd.DataFrame(results)
+    def __init__(self, results_path: Path):
+        # JSONL file written by BatchRunner.execute_batch, one result per line
+        self.results_path = Path(results_path)
         self.timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        
-    def generate_report(self):
-        if self.df.empty:
-            print("No results to visualize.")
-            return
+        self.status_counts = Counter()
+        # (attack type, status) pairs, for the per-type breakdown in the summary
+        self.type_status_counts = Counter()
+        self.error_counts = Counter()
+        self.total = 0
 
-        # 1. Save raw data
+    def generate_report(self, formats=('csv',)):
+        """
+        Aggregate the results and write the requested outputs.
+        
+        Args:
+            formats: 'csv' writes the raw data table, 'png' renders the charts.
+                     Counts are always collected, so () gives a summary-only run.
+        """
+        # 1. Save raw data while aggregating, one record in memory at a time
         csv_path = REPORTS_DIR / f'batch_test_{self.timestamp}.csv'
-        self.df.to_csv(csv_path, index=False)
-        print(f"📄 Raw data saved to: {csv_path}")
+        with open(self.results_path, 'r', encoding='utf-8') as src:
+            if 'csv' in formats:
+                with open(csv_path, 'w', newline='', encoding='utf-8') as dst:
+                    writer = csv.DictWriter(dst, fieldnames=FIELDNAMES)
+                    writer.writeheader()
+                    for rec in self._records(src):
+                        writer.writerow(rec)
+                        self._count(rec)
+            else:
+                for rec in self._records(src):
+                    self._count(rec)
         
-        # 2. Generate Charts
-        self._plot_status_distribution()
-        self._plot_failure_reasons()
+        if not self.total:
+            if 'csv' in formats:
+                csv_path.unlink()
+            print("No results to visualize.")
+            return
+        if 'csv' in formats:
+            print(f"📄 Raw data saved to: {csv_path}")
         
-        print(f"📊 Charts saved to: {REPORTS_DIR}")
+        # 2. Generate Charts (only on request: each figure costs hundreds of ms plus the matplotlib import)
+        if 'png' in formats:
+            self._plot_status_distribution()
+            self._plot_failure_reasons()
+            
+            print(f"📊 Charts saved to: {REPORTS_DIR}")
+
+    @staticmethod
+    def _records(f):
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+    def _count(self, rec):
+        self.total += 1
+        self.status_counts[rec['status']] += 1
+        self.type_status_counts[(rec['type'], rec['status'])] += 1
+        if rec['status'] == 'BLOCKED':
+            # Extract main error reason (simplify long error strings)
+            e = str(rec['error'])
+            self.error_counts[e[:50] + '...' if len(e) > 50 else e] += 1
 
     def _plot_status_distribution(self):
         """Pie chart of Blocked vs Vulnerable"""
+        # Imported here so runs that never draw charts skip the matplotlib import cost
+        import matplotlib.pyplot as plt
+        
         plt.figure(figsize=(10, 6))
-        status_counts = self.df['status'].value_counts()
+        status_counts = self.status_counts.most_common()
+        labels = [status for status, _ in status_counts]
         
         colors = {'BLOCKED': '#4CAF50', 'VULNERABLE': '#F44336', 'ERROR': '#FFC107'}
         # Map colors to existing statuses
-        plot_colors = [colors.get(x, '#9E9E9E') for x in status_counts.index]
+        plot_colors = [colors.get(x, '#9E9E9E') for x in labels]
         
-        plt.pie(status_counts, labels=status_counts.index, autopct='%1.1f%%', colors=plot_colors, startangle=90)
-        plt.title(f'Attack Simulation Results (N={len(self.df)})')
+        plt.pie([count for _, count in status_counts], labels=labels, autopct='%1.1f%%', colors=plot_colors, startangle=90)
+        plt.title(f'Attack Simulation Results (N={self.total})')
         
         output_path = REPORTS_DIR / f'status_dist_{self.timestamp}.png'
         plt.savefig(output_path)
@@ -43,15 +96,15 @@ class Visualizer:
 
     def _plot_failure_reasons(self):
         """Bar chart of error messages for blocked attacks"""
-        blocked_df = self.df[self.df['status'] == 'BLOCKED']
-        if blocked_df.empty:
+        if not self.error_counts:
             return
-            
+        
+        import matplotlib.pyplot as plt
+        
         plt.figure(figsize=(12, 8))
-        # Extract main error reason (simplify long error strings)
-        error_counts = blocked_df['error'].apply(lambda x: str(x)[:50] + '...' if len(str(x)) > 50 else str(x)).value_counts()
+        error_counts = self.error_counts.most_common(TOP_REASONS)
         
-        error_counts.plot(kind='barh', color='#2196F3')
+        plt.barh([reason for reason, _ in error_counts], [count for _, count in error_counts], color='#2196F3')
         plt.title('Top Blocking Reasons (Defense Mechanisms)')
         plt.xlabel('Count')
         plt.tight_layout()
@@ -24,6 +24,7 @@ def main():
     parser = argparse.ArgumentParser(description='ERC-4337 AI-Driven Batch Security Test')
     parser.add_argument('--count', type=int, default=50, help='Number of attack vectors to generate')
     parser.add_argument('--mock', action='store_true', default=True, help='Use mock generator (fuzzing) instead of real AI API')
+    parser.add_argument('--formats', default='csv,png', help='Comma-separated report outputs: csv, png (empty for summary only)')
     
     args = parser.parse_args()
     
@@ -50,17 +51,21 @@ def main():
         # 2. Execute Attacks
         print(f"\n[Phase 2] Executing attacks against local node...")
         runner = BatchRunner()
-        results = runner.execute_batch(attacks)
+        results_path = runner.execute_batch(attacks)
+        print(f"📝 Results streamed to: {results_path}")
         
         # 3. Visualize Results
         print(f"\n[Phase 3] Analyzing and visualizing results...")
-        viz = Visualizer(results)
-        viz.generate_report()
+        viz = Visualizer(results_path)
+        viz.generate_report(formats=tuple(fmt for fmt in args.formats.split(',') if fmt))
         
         # Summary
-        vuln_count = sum(1 for r in results if r['status'] == 'VULNERABLE')
+        vuln_count = viz.status_counts['VULNERABLE']
         print("\n" + "="*60)
         print(f"🏁 Test Complete. Found {vuln_count} potential vulnerabilities.")
+        for (attack_type, status), count in sorted(viz.type_status_counts.items()):
+            if status == 'VULNERABLE':
+                print(f"   - {attack_type}: {count}")
         print("="*60)
         
     except Exception as e:
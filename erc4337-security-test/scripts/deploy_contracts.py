@@ -1,12 +1,59 @@
-import json
+import hashlib
+import orjson
 import os
-from solcx import compile_source, set_solc_version
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from solcx import compile_files, set_solc_version
+from eth_utils import keccak, to_checksum_address
 from web3 import Web3
 from eth_account import Account
+from eth_account._utils.legacy_transactions import encode_transaction, serializable_unsigned_transaction_from_dict
 from pathlib import Path
 
+try:
+    import fcntl  # POSIX only; cache writes are unlocked elsewhere
+except ImportError:
+    fcntl = None
+
 # Set Solidity version (must match version in contracts)
-set_solc_version('0.8.19')
+SOLC_VERSION = '0.8.19'
+set_solc_version(SOLC_VERSION)
+# Optimizer/metadata settings passed to solc (part of the compile cache key)
+OPTIMIZE_RUNS = 200
+# 'none' drops the IPFS metadata hash footer from the bytecode, shrinking every deploy tx
+METADATA_HASH = 'none'
+
+# Receipt polling interval; Hardhat automines, so receipts appear almost immediately
+POLL_LATENCY = 0.01
+
+# Headroom added on top of eth_estimateGas for deployment gas limits
+GAS_MARGIN = 1.2
+
+# Compiled ABI/bytecode cache, keyed by contract source + compiler version
+SOLC_CACHE_DIR = Path('data/.solc_cache')
+
+# Use first Hardhat test account as deployer
+DEPLOYER = Account.from_key('0xac0974bec39a17e36ba4a6b4d238ff944bacb478cbed5efcae784d7bf4f2ff80')
+# Second account as regular user
+USER = Account.from_key('0x59c6995e998f97a5a0044966f0945389dc9e86dae88c7a8412f4603b6b78690d')
+
+def update_env_file(env_path, values):
+    """Set KEY=value entries in a .env file, replacing existing keys instead of appending duplicates"""
+    lines = env_path.read_text(encoding='utf-8').splitlines() if env_path.exists() else []
+    
+    pending = dict(values)
+    for i, line in enumerate(lines):
+        key = line.split('=', 1)[0].strip()
+        if '=' in line and key in pending:
+            lines[i] = f"{key}={pending.pop(key)}"
+    
+    if pending:
+        lines += ['', '# ERC-4337 Contract Addresses'] + [f"{key}={value}" for key, value in pending.items()]
+    
+    # Write to a temp file and swap it in, so an interrupted run never leaves a truncated .env
+    tmp_path = env_path.with_name(env_path.name + '.tmp')
+    tmp_path.write_text('\n'.join(lines) + '\n', encoding='utf-8')
+    os.replace(tmp_path, env_path)
 
 class ERC4337Deployer:
     def __init__(self, rpc_url="http://127.0.0.1:8545"):
@@ -15,91 +62,274 @@ class ERC4337Deployer:
         if not self.w3.is_connected():
             raise Exception("❌ Failed to connect to local node. Make sure 'npx hardhat node' is running")
         
-        # Use first Hardhat test account as deployer
-        self.deployer = Account.from_key(
-            '0xac0974bec39a17e36ba4a6b4d238ff944bacb478cbed5efcae784d7bf4f2ff80'
-        )
+        # Hardhat test accounts, derived once at import time
+        self.deployer = DEPLOYER
+        self.user = USER
+        # Checksummed address used in every tx/call built below
+        self.deployer_address = DEPLOYER.address
         
-        # Second account as regular user
-        self.user = Account.from_key(
-            '0x59c6995e998f97a5a0044966f0945389dc9e86dae88c7a8412f4603b6b78690d'
-        )
+        # Chain ID never changes for a node, so fetch it once and reuse it for every tx
+        self._chain_id = self.w3.eth.chain_id
         
         print("=" * 60)
         print("ERC-4337 Contract Deployer")
         print("=" * 60)
-        print(f"Network: {'Connected' if self.w3.is_connected() else 'Disconnected'}")
-        print(f"Chain ID: {self.w3.eth.chain_id}")
-        print(f"Deployer: {self.deployer.address}")
+        print(f"Network: Connected")  # checked above
+        print(f"Chain ID: {self._chain_id}")
+        print(f"Deployer: {self.deployer_address}")
         print(f"User: {self.user.address}")
         print(f"Current Block: {self.w3.eth.block_number}")
         
+        # Deployer nonce and gas price, fetched once per deploy_all and tracked locally
+        self._nonce = None
+        self._gas_price = None
+        
+        # Contract classes by name; each one parses its ABI once and is reused for instances
+        self._factories = {}
+        
     def compile_contract(self, contract_name):
         """Compile Solidity contract file"""
-        contract_path = Path(f"contracts/{contract_name}.sol")
-        if not contract_path.exists():
-            raise FileNotFoundError(f"Contract file not found: {contract_path}")
+        return self.compile_contracts([contract_name])[contract_name]
+    
+    def compile_contracts(self, contract_names):
+        """Compile several Solidity contract files with a single solc invocation
         
-        with open(contract_path, 'r', encoding='utf-8') as f:
-            source_code = f.read()
+        Returns {contract_name: (abi, bytecode)}. Contracts whose source is unchanged
+        since the last run are served from the on-disk cache and skip solc entirely.
+        """
+        results = {}
+        pending = {}
+        for contract_name in contract_names:
+            contract_path = Path(f"contracts/{contract_name}.sol")
+            if not contract_path.exists():
+                raise FileNotFoundError(f"Contract file not found: {contract_path}")
+            
+            with open(contract_path, 'rb') as f:
+                source_code = f.read()
+            
+            # Compilation is deterministic in source + compiler settings, so reuse earlier output
+            key = hashlib.sha256(source_code + f"{SOLC_VERSION}-opt{OPTIMIZE_RUNS}-meta{METADATA_HASH}".encode()).hexdigest()
+            cache_path = SOLC_CACHE_DIR / f"{contract_name}-{key}.json"
+            if cache_path.exists():
+                print(f"\nUsing cached compilation: {contract_name}")
+                cached = orjson.loads(cache_path.read_bytes())
+                results[contract_name] = (cached['abi'], cached['bin'])
+            else:
+                pending[contract_name] = (contract_path, cache_path)
         
-        print(f"\nCompiling contract: {contract_name}")
-        compiled = compile_source(source_code, solc_version='0.8.19')
-        contract_id, contract_interface = compiled.popitem()
+        if pending:
+            print(f"\nCompiling contracts: {', '.join(pending)}")
+            compiled = compile_files(
+                [str(contract_path) for contract_path, _ in pending.values()],
+                solc_version=SOLC_VERSION,
+                optimize=True,
+                optimize_runs=OPTIMIZE_RUNS,
+                metadata_hash=METADATA_HASH,
+                output_values=['abi', 'bin']
+            )
+            # Output is keyed by "path:ContractName"; interfaces declared alongside are skipped
+            by_name = {contract_id.rsplit(':', 1)[-1]: interface for contract_id, interface in compiled.items()}
+            for contract_name, (_, cache_path) in pending.items():
+                contract_interface = by_name[contract_name]
+                self._write_compile_cache(cache_path, contract_interface['abi'], contract_interface['bin'])
+                results[contract_name] = (contract_interface['abi'], contract_interface['bin'])
         
-        return contract_interface['abi'], contract_interface['bin']
+        return results
     
-    def deploy_contract(self, contract_name, abi, bytecode, args=(), value=0):
-        """Deploy contract to blockchain"""
+    @staticmethod
+    def _write_compile_cache(cache_path, abi, bytecode):
+        """Write a cache entry atomically (temp file + os.replace) under an exclusive lock"""
+        SOLC_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+        with open(SOLC_CACHE_DIR / '.lock', 'w') as lock:
+            if fcntl is not None:
+                fcntl.flock(lock, fcntl.LOCK_EX)
+            fd, tmp_path = tempfile.mkstemp(dir=SOLC_CACHE_DIR, suffix='.tmp')
+            with os.fdopen(fd, 'wb') as f:
+                f.write(orjson.dumps({'abi': abi, 'bin': bytecode}))
+            os.replace(tmp_path, cache_path)
+    
+    def _batch_calls(self, requests):
+        """Send read-only RPC requests as one JSON-RPC batch
+        
+        Each entry is a zero-argument callable building the request, so the list
+        can be replayed one by one if the node rejects the batch.
+        """
+        try:
+            with self.w3.batch_requests() as batch:
+                for build in requests:
+                    batch.add(build())
+                return list(batch.execute())
+        except Exception:
+            results = []
+            for build in requests:
+                request = build()
+                results.append(request.call() if hasattr(request, 'call') else request)
+            return results
+    
+    def _tx_params(self):
+        """Nonce and gas price for the next deployer transaction (nonce incremented locally)"""
+        if self._nonce is None:
+            self._nonce, self._gas_price = self._batch_calls([
+                lambda: self.w3.eth.get_transaction_count(self.deployer_address),
+                lambda: self.w3.eth.gas_price
+            ])
+        nonce = self._nonce
+        self._nonce += 1
+        return nonce, self._gas_price
+    
+    @staticmethod
+    def _create_address(sender, nonce):
+        """Address of a contract created by sender at nonce: keccak(rlp([sender, nonce]))[12:]"""
+        if nonce == 0:
+            nonce_rlp = b'\x80'
+        elif nonce < 0x80:
+            nonce_rlp = bytes([nonce])
+        else:
+            nonce_bytes = nonce.to_bytes((nonce.bit_length() + 7) // 8, 'big')
+            nonce_rlp = bytes([0x80 + len(nonce_bytes)]) + nonce_bytes
+        payload = b'\x94' + bytes.fromhex(sender[2:]) + nonce_rlp
+        return to_checksum_address(keccak(bytes([0xc0 + len(payload)]) + payload)[12:])
+    
+    def _contract_factory(self, contract_name, abi, bytecode=None):
+        """Return the cached contract class for contract_name, building it on first use"""
+        factory = self._factories.get(contract_name)
+        if factory is None:
+            factory = self._factories[contract_name] = self.w3.eth.contract(abi=abi, bytecode=bytecode)
+        return factory
+    
+    def _estimate_request(self, contract_name, abi, bytecode, args=(), value=0):
+        """eth_estimateGas request for a deployment, for use with _batch_calls"""
+        constructor = self._contract_factory(contract_name, abi, bytecode).constructor(*args)
+        return lambda: self.w3.eth.estimate_gas({
+            'from': self.deployer_address,
+            'data': constructor.data_in_transaction,
+            'value': value
+        })
+    
+    def build_deployment(self, contract_name, abi, bytecode, args=(), value=0, gas_estimate=None):
+        """Build an unsigned deployment transaction
+        
+        Returns (transaction, expected_address); the address follows from the locally tracked nonce.
+        """
         print(f"Deploying contract: {contract_name}")
         
         # Create contract object
-        contract = self.w3.eth.contract(abi=abi, bytecode=bytecode)
+        contract = self._contract_factory(contract_name, abi, bytecode)
+        
+        # Gas limit from the node's estimate plus headroom instead of a fixed 4M
+        if gas_estimate is None:
+            gas_estimate = self._estimate_request(contract_name, abi, bytecode, args, value)()
         
         # Build deployment transaction
+        nonce, gas_price = self._tx_params()
         transaction = contract.constructor(*args).build_transaction({
-            'from': self.deployer.address,
-            'nonce': self.w3.eth.get_transaction_count(self.deployer.address),
-            'gas': 4000000,
-            'gasPrice': self.w3.eth.gas_price,
+            'from': self.deployer_address,
+            'nonce': nonce,
+            'gas': int(gas_estimate * GAS_MARGIN),
+            'gasPrice': gas_price,
             'value': value,
-            'chainId': 31337  # Hardhat local network chain ID
+            'chainId': self._chain_id
         })
         
-        # Sign and send transaction
-        signed_txn = self.deployer.sign_transaction(transaction)
-        tx_hash = self.w3.eth.send_raw_transaction(signed_txn.raw_transaction)
+        return transaction, self._create_address(self.deployer_address, nonce)
+    
+    def _sign_transaction(self, transaction):
+        """Sign a legacy (gasPrice) transaction built by build_deployment and return the raw bytes
         
-        # Wait for deployment to complete
-        print(f"  Transaction Hash: {tx_hash.hex()}")
-        receipt = self.w3.eth.wait_for_transaction_receipt(tx_hash)
+        The dict is already complete and checked by build_transaction, so this serializes it
+        once and signs the digest with the deployer key directly, skipping the field
+        validation and formatting pass of Account.sign_transaction.
+        """
+        unsigned = serializable_unsigned_transaction_from_dict(
+            {key: value for key, value in transaction.items() if key != 'from'}
+        )
+        signature = self.deployer._key_obj.sign_msg_hash(unsigned.hash())
+        # EIP-155 replay protection: v = recovery id + 35 + 2 * chainId
+        v = signature.v + 35 + 2 * self._chain_id
+        return encode_transaction(unsigned, (v, signature.r, signature.s))
+    
+    def send_transactions(self, transactions):
+        """Sign all transactions up front in a thread pool, then send them in nonce order"""
+        with ThreadPoolExecutor(max_workers=len(transactions)) as pool:
+            raw_txns = list(pool.map(self._sign_transaction, transactions))
+        
+        tx_hashes = []
+        for raw_txn in raw_txns:
+            tx_hash = self.w3.eth.send_raw_transaction(raw_txn)
+            print(f"  Transaction Hash: {tx_hash.hex()}")
+            tx_hashes.append(tx_hash)
+        return tx_hashes
+    
+    def send_deployment(self, contract_name, abi, bytecode, args=(), value=0, gas_estimate=None):
+        """Sign and send a deployment transaction without waiting for it to be mined
+        
+        Returns (tx_hash, expected_address).
+        """
+        transaction, expected_address = self.build_deployment(
+            contract_name, abi, bytecode, args, value, gas_estimate
+        )
+        tx_hash, = self.send_transactions([transaction])
+        return tx_hash, expected_address
+    
+    def wait_for_deployment(self, contract_name, abi, tx_hash, expected_address=None):
+        """Wait for a deployment transaction and return (contract instance, address)"""
+        receipt = self.w3.eth.wait_for_transaction_receipt(tx_hash, poll_latency=POLL_LATENCY)
         
         if receipt.status == 1:
             contract_address = receipt.contractAddress
-            print(f"  ✅ Deployment successful!")
+            if expected_address is not None and contract_address != expected_address:
+                raise Exception(f"{contract_name} deployed at {contract_address}, expected {expected_address}")
+            print(f"  ✅ {contract_name} deployment successful!")
             print(f"     Address: {contract_address}")
             print(f"     Gas Used: {receipt.gasUsed}")
             
             # Return contract instance
-            return self.w3.eth.contract(address=contract_address, abi=abi), contract_address
+            return self._contract_factory(contract_name, abi)(address=contract_address), contract_address
         else:
             raise Exception(f"Deployment failed, transaction hash: {tx_hash.hex()}")
     
+    def deploy_contract(self, contract_name, abi, bytecode, args=(), value=0):
+        """Deploy contract to blockchain"""
+        tx_hash, expected_address = self.send_deployment(contract_name, abi, bytecode, args, value)
+        return self.wait_for_deployment(contract_name, abi, tx_hash, expected_address)
+    
     def deploy_all(self):
         """Deploy all ERC-4337 core contracts"""
         deployments = {}
         
         try:
+            # Pre-transaction metadata in one batch; the nonce is then incremented locally
+            self._nonce, self._gas_price = self._batch_calls([
+                lambda: self.w3.eth.get_transaction_count(self.deployer_address),
+                lambda: self.w3.eth.gas_price
+            ])
+            
             # 1. Deploy EntryPoint contract
             print("\n" + "=" * 60)
             print("1. Deploying SimpleEntryPoint Contract")
             print("=" * 60)
             
-            entrypoint_abi, entrypoint_bytecode = self.compile_contract("SimpleEntryPoint")
-            entrypoint_contract, entrypoint_address = self.deploy_contract(
+            # Compile both contracts up front in one solc run
+            compiled = self.compile_contracts(["SimpleEntryPoint", "SimpleAccount"])
+            
+            # All three transactions (two deployments + funding) are built and signed before any is
+            # sent: with locally tracked nonces the contract addresses are known up front
+            entrypoint_abi, entrypoint_bytecode = compiled["SimpleEntryPoint"]
+            account_abi, account_bytecode = compiled["SimpleAccount"]
+            account_args = (self.user.address, self._create_address(self.deployer_address, self._nonce))
+            
+            # Gas estimates for both deployments in one batch (the constructors make no external calls,
+            # so SimpleAccount can be estimated before the EntryPoint exists)
+            entrypoint_gas, account_gas = self._batch_calls([
+                self._estimate_request("SimpleEntryPoint", entrypoint_abi, entrypoint_bytecode),
+                self._estimate_request("SimpleAccount", account_abi, account_bytecode, account_args)
+            ])
+            
+            entrypoint_tx, entrypoint_address = self.build_deployment(
                 "SimpleEntryPoint", 
                 entrypoint_abi, 
-                entrypoint_bytecode
+                entrypoint_bytecode,
+                gas_estimate=entrypoint_gas
             )
             
             deployments['entryPoint'] = {
@@ -112,12 +342,12 @@ class ERC4337Deployer:
             print("2. Deploying SimpleAccount Contract")
             print("=" * 60)
             
-            account_abi, account_bytecode = self.compile_contract("SimpleAccount")
-            account_contract, account_address = self.deploy_contract(
+            account_tx, account_address = self.build_deployment(
                 "SimpleAccount",
                 account_abi,
                 account_bytecode,
-                args=(self.user.address, entrypoint_address)  # Set owner and EntryPoint address
+                args=(self.user.address, entrypoint_address),  # Set owner and EntryPoint address
+                gas_estimate=account_gas
             )
             
             deployments['simpleAccount'] = {
@@ -130,25 +360,44 @@ class ERC4337Deployer:
             print("3. Transferring Test ETH to Smart Contract Wallet")
             print("=" * 60)
             
+            nonce, gas_price = self._tx_params()
             transfer_tx = {
-                'from': self.deployer.address,
+                'from': self.deployer_address,
                 'to': account_address,
                 'value': self.w3.to_wei(1, 'ether'),
                 'gas': 100000,
-                'gasPrice': self.w3.eth.gas_price,
-                'nonce': self.w3.eth.get_transaction_count(self.deployer.address),
-                'chainId': 31337
+                'gasPrice': gas_price,
+                'nonce': nonce,
+                'chainId': self._chain_id
             }
             
-            signed_transfer = self.deployer.sign_transaction(transfer_tx)
-            transfer_hash = self.w3.eth.send_raw_transaction(signed_transfer.raw_transaction)
-            transfer_receipt = self.w3.eth.wait_for_transaction_receipt(transfer_hash)
+            # Sign the three transactions in parallel, then send them back to back
+            print("\nSigning and sending transactions...")
+            entrypoint_hash, account_hash, transfer_hash = self.send_transactions(
+                [entrypoint_tx, account_tx, transfer_tx]
+            )
+            
+            # Collect the receipts of all three transactions
+            print("\nWaiting for transactions to be mined...")
+            entrypoint_contract, _ = self.wait_for_deployment(
+                "SimpleEntryPoint", entrypoint_abi, entrypoint_hash, entrypoint_address
+            )
+            account_contract, _ = self.wait_for_deployment(
+                "SimpleAccount", account_abi, account_hash, account_address
+            )
+            transfer_receipt = self.w3.eth.wait_for_transaction_receipt(transfer_hash, poll_latency=POLL_LATENCY)
+            
+            # All remaining reads happen after the last state-changing tx, so fetch them in one batch
+            balance, actual_owner, actual_entrypoint, latest_block = self._batch_calls([
+                lambda: self.w3.eth.get_balance(account_address),
+                lambda: account_contract.functions.owner(),
+                lambda: account_contract.functions.entryPoint(),
+                lambda: self.w3.eth.get_block('latest')
+            ])
             
             if transfer_receipt.status == 1:
-                balance = self.w3.eth.get_balance(account_address)
                 print(f"  ✅ Transfer successful!")
                 print(f"     Contract wallet balance: {self.w3.from_wei(balance, 'ether')} ETH")
-                print(f"     Transaction hash: {transfer_hash.hex()}")
             else:
                 print("  ⚠️ Transfer failed, but contract deployment succeeded")
             
@@ -158,13 +407,11 @@ class ERC4337Deployer:
             print("=" * 60)
             
             # Verify SimpleAccount owner
-            actual_owner = account_contract.functions.owner().call()
             print(f"  Contract wallet owner: {actual_owner}")
             print(f"  Expected owner: {self.user.address}")
             print(f"  ✅ Owner verification: {'Passed' if actual_owner == self.user.address else 'Failed'}")
             
             # Verify EntryPoint link
-            actual_entrypoint = account_contract.functions.entryPoint().call()
             print(f"  Linked EntryPoint: {actual_entrypoint}")
             print(f"  Actual EntryPoint: {entrypoint_address}")
             print(f"  ✅ EntryPoint link verification: {'Passed' if actual_entrypoint == entrypoint_address else 'Failed'}")
@@ -181,27 +428,32 @@ class ERC4337Deployer:
             # Save deployment info to JSON file
             deployment_info = {
                 'network': {
-                    'chainId': self.w3.eth.chain_id,
+                    'chainId': self._chain_id,
                     'rpcUrl': 'http://127.0.0.1:8545'
                 },
                 'accounts': {
-                    'deployer': self.deployer.address,
+                    'deployer': self.deployer_address,
                     'user': self.user.address
                 },
                 'contracts': deployments,
-                'timestamp': self.w3.eth.get_block('latest')['timestamp']
+                'timestamp': latest_block['timestamp']
             }
             
-            with open(data_dir / 'deployments.json', 'w') as f:
-                json.dump(deployment_info, f, indent=2)
+            with open(data_dir / 'deployments.json', 'wb') as f:
+                # HexBytes (a bytes subclass) values are written as hex strings
+                f.write(orjson.dumps(
+                    deployment_info,
+                    option=orjson.OPT_INDENT_2,
+                    default=lambda o: o.hex() if isinstance(o, bytes) else str(o)
+                ))
             
             print(f"  ✅ Deployment info saved to: {data_dir / 'deployments.json'}")
             
             # 6. Update .env file
-            with open('.env', 'a') as f:
-                f.write(f'\n# ERC-4337 Contract Addresses\n')
-                f.write(f'ENTRY_POINT_ADDRESS={entrypoint_address}\n')
-                f.write(f'SIMPLE_ACCOUNT_ADDRESS={account_address}\n')
+            update_env_file(Path('.env'), {
+                'ENTRY_POINT_ADDRESS': entrypoint_address,
+                'SIMPLE_ACCOUNT_ADDRESS': account_address
+            })
             
             print(f"  ✅ Environment variables updated")
             